@@ -1,3 +1,5 @@
+import asyncio
+
 from discord.ext.commands import Bot
 from discord.utils import get
 from discord.channel import DMChannel
@@ -13,27 +15,46 @@ class BotClient(Bot):
 
         self.voice = Voice(self)
         self.user_manager = user_manager
+        self._voice_of = {}
         #self.ws_server = WSServer(self)
-        
+
+
+    async def _chunk_guilds(self, max_concurrent=5):
+        sem = asyncio.Semaphore(max_concurrent)
+
+        async def _chunk(guild):
+            async with sem:
+                await guild.chunk()
+
+        await asyncio.gather(*[_chunk(g) for g in self.guilds])
+
 
     async def on_ready(self):
         print('Looking for new users...')
 
-        for g in self.guilds:
-            await g.chunk()
+        bot_id = self.user.id
+        get_user = self.user_manager.get_user
+
+        await self._chunk_guilds()
 
+        self._voice_of = {
+            m.id: vc for g in self.guilds for vc in g.voice_channels for m in vc.members
+        }
+
+        for g in self.guilds:
             new_users = []
             for m in g.members:
-                if self.user.id == m.id:
+                member_id = m.id
+                if member_id == bot_id:
                     continue
 
-                user = self.user_manager.get_user(m.id)
+                user = get_user(member_id)
 
                 if user:
                     user.user_name = m.name
                 else:
                     new_users.append(BotUser(
-                        user_id=m.id,
+                        user_id=member_id,
                         user_name=m.name
                     ))
 
@@ -46,10 +67,26 @@ class BotClient(Bot):
 
 
     async def on_message(self, message):
-        if message.author == self.user:
-            return  
-        
-        await super().process_commands(message) 
+        # Commands are never invoked by bots (ourselves included) and can't
+        # be in a message without text, so skip those before any other work
+        if message.author.bot or not message.content:
+            return
+
+        await super().process_commands(message)
+
+
+    async def on_voice_state_update(self, member, before, after):
+        if after.channel:
+            self._voice_of[member.id] = after.channel
+
+        # Moving between guilds can deliver the new guild's join before the
+        # old guild's leave, so only forget the channel actually being left
+        elif self._voice_of.get(member.id) == before.channel:
+            self._voice_of.pop(member.id, None)
+
+
+    def get_voice_channel(self, user_id):
+        return self._voice_of.get(user_id)
 
 
     async def on_member_join(self, member):
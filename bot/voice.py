@@ -56,9 +56,6 @@ class Voice(object):
     async def _play_url(self, channel, url, title, delay):
         await self.join_voice_channel(channel)
         await self._set_now_playing(url, title)
-        import requests
-        r = requests.get(url, allow_redirects=True)
-        open(f'{title}.mp3', 'wb').write(r.content)
         await asyncio.sleep(delay)
         await self._voice_play(discord.FFmpegPCMAudio(url, **FFMPEG_OPTIONS), title)
 
@@ -6,12 +6,27 @@ import discord
 from utils.date_helpers import get_next_occurance
 
 from datetime import datetime
+from functools import lru_cache
 import dateutil.parser
 from discord.ext import commands
 from discord.utils import get
 
 from utils.discord_helpers import send_text_list_to_author
 
+BIRTHDAY_FORMAT = '%Y-%m-%d'
+
+
+@lru_cache(maxsize=None)
+def _parse_birthday(birthday):
+    # add_birthday always stores this format, only fall back to dateutil
+    # for birthdays that were written into the users json by hand
+    try:
+        birth_date = datetime.strptime(birthday, BIRTHDAY_FORMAT)
+    except ValueError:
+        birth_date = dateutil.parser.parse(birthday)
+
+    return birth_date.month, birth_date.day
+
 
 class Birthdays(commands.Cog):
     def __init__(self, bot, user_manager):
@@ -27,7 +42,7 @@ class Birthdays(commands.Cog):
                
         try:
             birthday_date = dateutil.parser.parse(birthday, dayfirst=True)
-        except Exception as e:
+        except (ValueError, OverflowError) as e:
             print(e)
             await ctx.send(f'Input \'{birthday}\' not valid \'{e}\'')
             return   
@@ -36,7 +51,7 @@ class Birthdays(commands.Cog):
             await ctx.send(f'Date cannot be in the future')
             return
 
-        formatted_date = birthday_date.strftime('%Y-%m-%d')
+        formatted_date = birthday_date.strftime(BIRTHDAY_FORMAT)
         
         self.user_manager.add_birthday(user.id, formatted_date)
 
@@ -49,9 +64,7 @@ class Birthdays(commands.Cog):
     async def list_birthday(self, ctx):
         print(f'List birthdays request from {ctx.message.author}')
 
-        birthdays = []
-        for u in self.user_manager.users:
-            birthdays.append(f'{u.user_name}: {u.birthday}')
+        birthdays = [f'{u.user_name}: {u.birthday}' for u in self.user_manager.users]
 
         await send_text_list_to_author(ctx, birthdays)
 
@@ -78,15 +91,14 @@ class Birthdays(commands.Cog):
     async def next_birthday(self, ctx):
         print(f"Display next user's birthday {ctx.message.author}")
 
-        users_with_birthdays = list(filter(lambda x: x.birthday is not None, self.user_manager.users))
-        winning_user = users_with_birthdays[0]
-        winning_birthday = self._get_date_countdown(winning_user)
+        countdowns = [(u, self._get_date_countdown(u)) for u in self.user_manager.get_users_with_birthdays()]
+
+        if not countdowns:
+            await ctx.send('No users have input their birthday')
+            return
 
-        for u in users_with_birthdays[1:]:
-            users_birthday = self._get_date_countdown(u)
-            if users_birthday.total_seconds > 0 and users_birthday.total_seconds < winning_birthday.total_seconds:
-                winning_user = u
-                winning_birthday = users_birthday
+        # Birthdays happening today have a negative countdown, so they win
+        winning_user, winning_birthday = min(countdowns, key=lambda c: c[1].total_seconds)
 
         if winning_birthday.is_today:
             await ctx.send(f"🥳🎉🎊 It's {winning_user.user_name}'s Birthday !!!! 🥳🎉🎊")
@@ -97,6 +109,6 @@ class Birthdays(commands.Cog):
 
 
     def _get_date_countdown(self, user):
-        user_birth_date = dateutil.parser.parse(user.birthday)
-        return get_next_occurance(user_birth_date.month, user_birth_date.day)
+        month, day = _parse_birthday(user.birthday)
+        return get_next_occurance(month, day)
         
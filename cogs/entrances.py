@@ -3,23 +3,27 @@ import sys
 import random
 import asyncio
 import discord
+import logging
 
 from discord.ext import commands
 from discord.utils import get
 
 from utils.discord_helpers import send_text_list_to_author
 
+logger = logging.getLogger('discord.entrances')
+
 
 class Entrances(commands.Cog):
     def __init__(self, bot, user_manager, sound_files):
         self.bot = bot
         self.user_manager = user_manager
         self.sound_files = sound_files
+        self._entrance_by_id = {u.user_id: u.entrance_filename for u in user_manager.users if u.entrance_filename}
 
 
     @commands.command(name='entrance', help='Set a users entrance audio')
     async def add_entrance(self, ctx, user: discord.User, filename):
-        print(f'Add entrance audio request from {ctx.message.author}')
+        logger.info('Add entrance audio request from %s', ctx.message.author)
 
         file_obj = self.sound_files.find(filename)
         if not file_obj:
@@ -28,35 +32,40 @@ class Entrances(commands.Cog):
 
         self.user_manager.add_entrance(user.id, filename)
 
+        if self.user_manager.get_user(user.id):
+            self._entrance_by_id[user.id] = filename
+
         msg = f'User {user} entrance audio has been set to \'{filename}\''
-        print(msg)
+        logger.info(msg)
         await ctx.send(msg)
 
 
     @commands.command(name='list_entrances', help='List all entrance sounds')
     async def list_entrances(self, ctx):
-        print(f'List entrance sounds request from {ctx.message.author}')
+        logger.info('List entrance sounds request from %s', ctx.message.author)
 
-        entrances = []
-        for u in self.user_manager.users:
-            entrances.append(f'{u.user_name}: {u.entrance_filename}')
-
-        await send_text_list_to_author(ctx, entrances)
+        entrances = sorted(f'{u.user_name}: {u.entrance_filename}' for u in self.user_manager.users)
+        await send_text_list_to_author(ctx, entrances, presorted=True)
 
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        if member == self.bot.user:
+        member_id = member.id
+        if member_id == self.bot.user.id:
+            return
+
+        entrance_filename = self._entrance_by_id.get(member_id)
+        if not entrance_filename:
+            return
+
+        # Mute, deafen and stream toggles keep the same channel object
+        channel = after.channel
+        if not channel or before.channel is channel:
             return
 
-        if after.channel and before.channel != after.channel:
-            user = self.user_manager.get_user(member.id)
-
-            if user and user.entrance_filename:
-                print(f'{member.name} has arrived in {after.channel.name} playing entrance audio \'{user.entrance_filename}\'')
-                try:
-                    sound_file = self.sound_files.find(user.entrance_filename)
-                    await self.bot.voice.play(channel=after.channel, source=sound_file.path, title=sound_file.name, delay=1)
-                except Exception as e:
-                    print(e)
-                    print(f'Failed to play {member.name} entrance audio \'{user.entrance_filename}\'')
\ No newline at end of file
+        logger.info('%s has arrived in %s playing entrance audio \'%s\'', member.name, channel.name, entrance_filename)
+        try:
+            sound_file = self.sound_files.find(entrance_filename)
+            await self.bot.voice.play(channel=channel, source=sound_file.path, title=sound_file.name, delay=1)
+        except Exception:
+            logger.exception('Failed to play %s entrance audio \'%s\'', member.name, entrance_filename)
\ No newline at end of file
@@ -1,15 +1,30 @@
+import io
 import discord
 import math
 from utils.date_helpers import get_next_occurance
 from discord.ext import commands
-from datetime import datetime, date
+from datetime import date
+from functools import lru_cache
+
+FRIDAY_URL = 'https://www.youtube.com/watch?v=1TewCPi92ro'
+XMAS_URL = 'https://youtu.be/pHMhEWyqj2g?t=75'
+NEDRY_GIF_PATH = 'resources/nedry.gif'
+
+
+# The resources folder is synced from the bucket after this module is
+# imported, so the gif is read on first use rather than at import time
+@lru_cache(maxsize=None)
+def _load_nedry_gif():
+    with open(NEDRY_GIF_PATH, 'rb') as f:
+        return f.read()
+
 
 @commands.command(name='friday', help='Its friday!')
 async def friday(ctx):
-    if datetime.today().weekday() == 4:
-        await ctx.send(f'https://www.youtube.com/watch?v=1TewCPi92ro')
+    if date.today().weekday() == 4:
+        await ctx.send(FRIDAY_URL)
     else:
-        await ctx.channel.send(file=discord.File('resources/nedry.gif'))
+        await ctx.channel.send(file=discord.File(io.BytesIO(_load_nedry_gif()), filename='nedry.gif'))
       
       
 @commands.command(name='xmas', help='Xmas Countdown')
@@ -17,7 +32,7 @@ async def xmas(ctx):
     date_countdown = get_next_occurance(12, 25)
            
     if date_countdown.is_today:
-        await ctx.send(f"🎄🎄🎄 Merry Xmas 🎄🎄🎄 \nhttps://youtu.be/pHMhEWyqj2g?t=75")
+        await ctx.send(f"🎄🎄🎄 Merry Xmas 🎄🎄🎄 \n{XMAS_URL}")
     else:    
         await ctx.send(f"🎄🎄🎄 It's {date_countdown.days} days, {date_countdown.hours} "\
             f"hours & {date_countdown.mins} minutes until Christmas !! 🎄🎄🎄")
\ No newline at end of file
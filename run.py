@@ -3,14 +3,18 @@
 import os
 import argparse
 import asyncio
+import atexit
 import logging
 import logging.handlers
 import json
+import queue
+from functools import partial
 
 from bot.client import BotClient
-from utils.files import FileRepo
+from utils.files import FileRepo, stop_subscriptions
 from utils.users import UserManager
 from utils.config import Config
+from utils.gcs_helpers import DEFAULT_DOWNLOAD_WORKERS
 from cogs.sound_board import SoundBoard
 from cogs.entrances import Entrances
 from cogs.google_img import GoogleImages
@@ -18,8 +22,14 @@ from cogs.birthdays import Birthdays
 from commands.fun import friday, xmas
 from discord import Intents
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config.json')
+REQUIRED_ENV = ('discord_token', 'bucket_path', 'GOOGLE_APPLICATION_CREDENTIALS')
 
 def _load_json_config(bucket_path):
     with open(CONFIG_FILE) as json_file:
@@ -29,9 +39,21 @@ def _load_json_config(bucket_path):
         )
 
 
+def _validate_env():
+    missing = [name for name in REQUIRED_ENV if not os.environ.get(name)]
+
+    if missing:
+        raise SystemExit(f'Missing required environment variables: {", ".join(missing)}')
+
+
 async def main():
+    # None of these are in the log format, skip looking them up per record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     logger = logging.getLogger('discord')
-    logger.setLevel(logging.INFO)
+    logger.setLevel(os.environ.get('log_level', 'INFO').upper())
 
     handler = logging.handlers.RotatingFileHandler(
         filename='discord.log',
@@ -40,9 +62,27 @@ async def main():
         backupCount=5,  # Rotate through 5 files
     )
     dt_fmt = '%Y-%m-%d %H:%M:%S'
-    formatter = logging.Formatter('[{asctime}] [{levelname:<8}] {name}: {message}', dt_fmt, style='{')
+    formatter = logging.Formatter('[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s', dt_fmt)
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    # Records are queued on the event loop and written out on the listener's
+    # thread, so a slow disk or stdout never stalls the bot
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue,
+        handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    _validate_env()
 
     args = {
         'discord_token': os.environ.get('discord_token'),
@@ -50,7 +90,8 @@ async def main():
         'gimg_api_token': os.environ.get('gimg_api_token'),
         'project_id': os.environ.get('project_id'),
         'bucket_sub_name': os.environ.get('bucket_sub_name'),
-        'bucket_path': os.environ.get('bucket_path')
+        'bucket_path': os.environ.get('bucket_path'),
+        'gcs_download_concurrency': int(os.environ.get('gcs_download_concurrency', DEFAULT_DOWNLOAD_WORKERS))
     }
     print(f'Arguments processed: {args}')
     
@@ -58,31 +99,56 @@ async def main():
         bucket_path=args['bucket_path']
     )
     
-    sound_files = FileRepo(
-        base_path=config.paths['sounds'],
-        bucket_path=config.get_bucket_path('sounds'),
-        project_id=args['project_id'],
-        bucket_sub_name=args['bucket_sub_name']
-    )
-
-    resource_files = FileRepo(
-        base_path=config.paths['resources'],
-        bucket_path=config.get_bucket_path('resources'),
-        project_id=args['project_id'],
-        bucket_sub_name=args['bucket_sub_name']
-    )
-
-    user_manager = UserManager(
-        user_repo=FileRepo(
+    # The three repos share one storage client and download at the same time,
+    # so its connection pool has to cover all of their download threads
+    http_pool_size = args['gcs_download_concurrency'] * 3
+
+    # Each FileRepo blocks while it syncs with the bucket, so build them on
+    # worker threads together and wait for the slowest rather than the sum
+    loop = asyncio.get_running_loop()
+    sound_files, resource_files, user_files = await asyncio.gather(
+        loop.run_in_executor(None, partial(
+            FileRepo,
+            base_path=config.paths['sounds'],
+            bucket_path=config.get_bucket_path('sounds'),
+            project_id=args['project_id'],
+            bucket_sub_name=args['bucket_sub_name'],
+            download_workers=args['gcs_download_concurrency'],
+            http_pool_size=http_pool_size
+        )),
+        loop.run_in_executor(None, partial(
+            FileRepo,
+            base_path=config.paths['resources'],
+            bucket_path=config.get_bucket_path('resources'),
+            project_id=args['project_id'],
+            bucket_sub_name=args['bucket_sub_name'],
+            download_workers=args['gcs_download_concurrency'],
+            http_pool_size=http_pool_size
+        )),
+        loop.run_in_executor(None, partial(
+            FileRepo,
             base_path=config.paths['users'],
             bucket_path=config.get_bucket_path('users'),
             project_id=args['project_id'],
             bucket_sub_name=args['bucket_sub_name'],
+            download_workers=args['gcs_download_concurrency'],
+            http_pool_size=http_pool_size,
             overwrite=True
-        )
+        ))
+    )
+
+    atexit.register(stop_subscriptions)
+
+    user_manager = UserManager(
+        user_repo=user_files
     )
     
-    intents = Intents.all()
+    # Presence and typing updates are the chattiest events and nothing uses
+    # them, members are needed to sync users and content to read commands
+    intents = Intents.default()
+    intents.typing = False
+    intents.members = True
+    intents.message_content = True
 
     bot = BotClient(
         user_manager=user_manager,
@@ -118,4 +184,7 @@ async def main():
         await bot.start(args['discord_token'])
 
 
+if uvloop:
+    uvloop.install()
+
 asyncio.run(main())
\ No newline at end of file
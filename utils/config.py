@@ -2,13 +2,18 @@
 
 
 class Config:
+    __slots__ = ('paths', 'base_bucket', 'bucket_paths')
+
     def __init__(self, cfg_json, base_bucket):
         self.paths = cfg_json['path']
         self.base_bucket = base_bucket
+        self.bucket_paths = {name: f'{base_bucket}/{path}' for name, path in self.paths.items()}
 
 
     def get_bucket_path(self, resource_name):
-        if not resource_name in self.paths:
+        bucket_path = self.bucket_paths.get(resource_name)
+
+        if bucket_path is None:
             raise Exception(f'Cannot find the resource path for {resource_name}')
 
-        return f'{self.base_bucket}/{self.paths[resource_name]}'
\ No newline at end of file
+        return bucket_path
\ No newline at end of file
@@ -1,33 +1,45 @@
-from datetime import datetime
+from datetime import date, datetime, time
+from functools import lru_cache
 
 class DateCountdown:
+    __slots__ = ('days', 'hours', 'mins', 'total_seconds', 'is_today')
+
     def __init__(self, days: int, hours: int, mins: int, total_seconds: int, is_today: bool):
         self.days = days
         self.hours = hours
         self.mins = mins
         self.total_seconds = total_seconds
-        self.is_today = is_today       
-        
+        self.is_today = is_today
+
+
+# The target only changes when the day does, so it's cached per calendar day
+# and just the time remaining is worked out on each call
+@lru_cache(maxsize=512)
+def _get_target_date(target_month, target_day, today_ordinal):
+    today = date.fromordinal(today_ordinal)
+    target_date = date(year=today.year, month=target_month, day=target_day)
+
+    if target_date < today:
+        target_date = date(year=today.year + 1, month=target_month, day=target_day)
+
+    return target_date
+
 
 def _get_delta(target_month, target_day):
-    today = datetime.today()
-    target_date = datetime(year=today.year, month=target_month, day=target_day)
-    delta = target_date - today    
-    
-    if delta.days < -1:
-        target_date = datetime(year=today.year + 1, month=target_month, day=target_day)
-        delta = target_date - today
-  
-    return (delta, target_date)
+    now = datetime.today()
+    target_date = _get_target_date(target_month, target_day, now.toordinal())
+    delta = datetime.combine(target_date, time()) - now
+
+    return (delta, target_date == now.date())
 
 
 def get_next_occurance(target_month, target_day):
-    delta, target_date = _get_delta(target_month, target_day)
+    delta, is_today = _get_delta(target_month, target_day)
     
     return DateCountdown(
         days=delta.days,
         hours=int(delta.seconds // (60 * 60)),
         mins=int((delta.seconds // 60) % 60),
         total_seconds=delta.total_seconds(),
-        is_today=datetime.now().date() == target_date.date()
+        is_today=is_today
     )
\ No newline at end of file
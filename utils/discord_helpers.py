@@ -1,71 +1,83 @@
-import sys
-
 from io import BytesIO
 from PIL import Image
 
 MSG_CHAR_LIMIT = 2000
 MAX_IMG_SIZE_MB = 8
+MAX_IMG_SIZE_BYTES = MAX_IMG_SIZE_MB * 1024 * 1024
 
 
-async def send_text_list_to_author(ctx, strings):
-    ret = '```'
+def _to_code_block(lines):
+    return '```\n' + '\n'.join(lines) + '```'
 
-    for s in sorted(strings):
-        if (len(ret) + len(s) >= MSG_CHAR_LIMIT - 6):
-            r = ret
-            r = f'{r}```'
-            await ctx.author.send(r)
-            ret = '```'
-        else:
-            ret = f'{ret}\n{s}'
 
-    ret = f'{ret}```'
-    await ctx.author.send(ret)
+async def send_text_list_to_author(ctx, strings, presorted=False):
+    if not presorted:
+        strings = sorted(s for s in strings if s)
 
+    # Leave room for the code block backticks around each message
+    limit = MSG_CHAR_LIMIT - 6
+    lines = []
+    size = 0
 
-def create_img_bytes(img):
-    bytes_io = BytesIO()
+    for s in strings:
+        line_size = len(s) + 1
+
+        if lines and size + line_size > limit:
+            await ctx.author.send(_to_code_block(lines))
+            lines = []
+            size = 0
+
+        lines.append(s)
+        size += line_size
+
+    await ctx.author.send(_to_code_block(lines))
 
+
+def create_img_bytes(img):
     try:
-        bytes_io.seek(0)
         raw_image_data = img.get_raw_data()
     except:
         print('There was an issue getting the image')
         return None
 
+    # Check the size first so oversized images are rejected without parsing
+    img_size = len(raw_image_data)
+
+    if img_size >= MAX_IMG_SIZE_BYTES:
+        print(f'Image ({img_size}) is larger than {MAX_IMG_SIZE_BYTES}')
+        return None
+
+    bytes_io = BytesIO(raw_image_data)
+
+    # Scrapes often return captcha or block pages instead of an image, PIL
+    # only needs to read the header to tell them apart
     try:
         print('Testing image...')
-        _ = raw_image_data.decode('utf-8')
+        Image.open(bytes_io).verify()
+    except Exception:
         print('Image test failed, this is not an image')
         return None
-    except:
-        img.copy_to(bytes_io, raw_image_data)
-        img.copy_to(bytes_io)
-        bytes_io.seek(0)
-
-        img_size = sys.getsizeof(bytes_io)
 
-        if img_size < MAX_IMG_SIZE_MB * (4**10):
-            print('Image is valid')
-            return bytes_io
-        else:
-            print(f'Image ({img_size}) is larger than {MAX_IMG_SIZE_MB * (4**10)}')
-            return None
+    bytes_io.seek(0)
+    print('Image is valid')
+    return bytes_io
 
 
 def get_channel_from_user(bot, user):
-    for g in bot.guilds:
-        for c in g.voice_channels:
-            for m in c.members:
-                if m.id == user.id:
-                    return c
+    channel = bot.get_voice_channel(user.id)
+
+    if channel:
+        return channel
 
     raise Exception(f'User {user.name} is not in a voice channel')
 
 
 def get_channel_from_ctx(bot, ctx):
-    if hasattr(ctx.message.author, 'voice') and hasattr(ctx.message.author.voice, 'channel'):
-        return ctx.message.author.voice.channel
+    # Only guild members have voice state, a DM author is a plain User
+    voice = getattr(ctx.message.author, 'voice', None)
+
+    if voice and voice.channel:
+        return voice.channel
 
     channel = get_channel_from_user(bot=bot, user=ctx.message.author)
 
@@ -76,10 +88,9 @@ def get_channel_from_ctx(bot, ctx):
 
 
 def get_channel_from_user_id(bot, user_id):
-    for g in bot.guilds:
-        for c in g.voice_channels:
-            for m in c.members:
-                if m.id == int(user_id):
-                    return c
+    channel = bot.get_voice_channel(int(user_id))
+
+    if channel:
+        return channel
 
     raise Exception(f'User {user_id} is not in a voice channel')
\ No newline at end of file
@@ -1,44 +1,111 @@
 import os
+import time
+import posixpath
 import random
+import threading
+
+from functools import lru_cache, partial
 
 from google.cloud import storage
 from google.cloud import pubsub_v1
 
-from utils.gcs_helpers import connect_to_bucket, download_file, download_files, list_files, generate_url, upload_file
+from utils.gcs_helpers import connect_to_bucket, download_file, download_files, list_files, generate_url, upload_file, URL_LIFETIME, DEFAULT_DOWNLOAD_WORKERS, DEFAULT_HTTP_POOL_SIZE
+
+URL_REFRESH_MARGIN = 300
+
+# Bucket events each trigger a download, so only hold a handful at a time
+# rather than the client's default of a thousand
+SUBSCRIBER_FLOW_CONTROL = pubsub_v1.types.FlowControl(max_messages=32, max_bytes=16 * 1024 * 1024)
+
+_subscriptions = {}
+_pull_futures = {}
+_subscriptions_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_subscriber_client():
+    return pubsub_v1.SubscriberClient()
+
+
+def stop_subscriptions():
+    with _subscriptions_lock:
+        futures = list(_pull_futures.values())
+        _pull_futures.clear()
+
+    for future in futures:
+        future.cancel()
+        future.result()
+
+
+def _dispatch_bucket_event(subscription_path, message):
+    print(f"Received {message.attributes['eventType']} message")
+    message.ack()
+
+    evnt_type = message.attributes['eventType']
+
+    if not evnt_type:
+        return
+
+    obj_id = message.attributes['objectId']
+    bucket_dir, filename = os.path.split(obj_id)
+
+    for repo in _subscriptions.get(subscription_path, ()):
+        if repo.bucket_dir == bucket_dir:
+            repo.handle_bucket_event(evnt_type, filename)
+
+
+def _remove_extension(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+# Names used to be made by dropping every dot, so 'a.b.mp3' was 'ab'. Those
+# names are saved as users' entrances, so they still need to resolve
+def _legacy_name(file_path):
+    return "".join(os.path.basename(file_path).split('.')[:-1])
+
 
 class FileObject:
+    __slots__ = ('path', 'name', 'bucket', '_url', '_url_expiration')
+
     def __init__(self, path, bucket=None):
         self.path = path
-        self.name = self._remove_extension(path)
+        self.name = _remove_extension(path)
         self.bucket = bucket
-
-    def _remove_extension(self, file_path):
-        filename = os.path.split(file_path)[-1]
-        return "".join(filename.split('.')[:-1])
+        self._url = None
+        self._url_expiration = 0
 
     def get_path(self):
         if self.bucket:
-            return generate_url(self.bucket, self.path)
+            # Signing is local crypto work, reuse the URL until it gets
+            # close to expiring rather than signing on every call
+            now = int(time.time())
+
+            if not self._url or now >= self._url_expiration - URL_REFRESH_MARGIN:
+                self._url_expiration = now + URL_LIFETIME
+                self._url = generate_url(self.bucket, self.path, expiration=self._url_expiration)
+
+            return self._url
 
         return self.path
 
 
 class FileRepo:
-    def __init__(self, base_path=None, bucket_path=None, project_id=None, bucket_sub_name=None, overwrite=False):
+    def __init__(self, base_path=None, bucket_path=None, project_id=None, bucket_sub_name=None, overwrite=False, download_workers=DEFAULT_DOWNLOAD_WORKERS, http_pool_size=DEFAULT_HTTP_POOL_SIZE):
         if not base_path and not bucket_path:
             raise Exception('Local base path and/or remote bucket path must be set')
 
         self.base_path = base_path
         self.bucket_path = bucket_path
 
+        # Joining with '' just adds the trailing separator, once
+        self._path_prefix = os.path.join(base_path, '') if base_path else None
+
         if self.base_path and not os.path.exists(self.base_path):
             os.makedirs(self.base_path)
 
         if self.bucket_path:
-            path_split = self.bucket_path.split('/')
-            bucket_name = path_split[0]
-            bucket_dir = '/'.join(path_split[1:])
-            self.bucket = connect_to_bucket(bucket_name)
+            bucket_name, _, bucket_dir = self.bucket_path.partition('/')
+            self.bucket = connect_to_bucket(bucket_name, pool_size=http_pool_size)
             self.bucket_dir = bucket_dir
 
             if not self.bucket:
@@ -50,33 +117,59 @@ class FileRepo:
                     bucket=self.bucket,
                     bucket_path=self.bucket_dir,
                     output_path=self.base_path,
-                    overwrite=overwrite
+                    overwrite=overwrite,
+                    max_workers=download_workers
                 )
 
-                if project_id and bucket_sub_name:
-                    self.subscribe_to_bucket(
-                        project_id=project_id,
-                        bucket_sub_name=bucket_sub_name
-                    )
-
-        self.files = [FileObject(os.path.join(self.base_path, f), self.bucket) for f in os.listdir(self.base_path)]
+        # scandir entries already know their type, so no stat per file
+        with os.scandir(self.base_path) as entries:
+            self.files = [
+                FileObject(e.path, self.bucket) for e in entries
+                if not e.name.startswith('.') and e.is_file()
+            ]
+
+        # Name lookups happen on every sound request, keep the first file
+        # for each name to match the order find() used to scan in
+        self._lock = threading.Lock()
+        self._by_path = {}
+        self._by_name = {}
+        self._by_legacy_name = {}
+        for f in self.files:
+            self._index_file(f)
+
+        # Only start taking bucket events once the files they update exist
+        if self.bucket_path and self.base_path and project_id and bucket_sub_name:
+            self.subscribe_to_bucket(
+                project_id=project_id,
+                bucket_sub_name=bucket_sub_name
+            )
 
 
     def create_file_path(self, filename):
-        return os.path.join(self.base_path, filename)
+        return self._path_prefix + filename
 
 
     def add_file(self, filename):
         file_path = self.create_file_path(filename=filename)
-        fo = FileObject(file_path, self.bucket)
-        self.files.append(fo)
 
-        return fo
+        with self._lock:
+            # Overwritten bucket files are downloaded again under the same path
+            existing = self._by_path.get(file_path)
+            if existing:
+                return existing
+
+            fo = FileObject(file_path, self.bucket)
+            self.files.append(fo)
+            self._index_file(fo)
+
+            return fo
 
 
     def update_file(self, file_obj):
         if self.bucket:
-            upload_file(bucket=self.bucket, source_path=file_obj.path, bucket_path=file_obj.path)
+            # Bucket paths are always '/' separated, whatever the local OS uses
+            bucket_path = posixpath.join(self.bucket_dir, os.path.basename(file_obj.path))
+            upload_file(bucket=self.bucket, source_path=file_obj.path, bucket_path=bucket_path)
 
 
     def delete_file(self, filename):
@@ -86,11 +179,42 @@ class FileRepo:
             print(f'Unable to delete file - {filename} not found')
             return
 
-        self.files = [f for f in self.files if f.path != file_path]
+        # Pub/Sub can deliver the same delete twice, on two callback threads
+        with self._lock:
+            fo = self._by_path.get(file_path)
+            self.files = [f for f in self.files if f.path != file_path]
+
+            if fo:
+                self._unindex_file(fo)
 
 
     def find(self, name) -> object:
-        return next((f for f in self.files if f.name == name), None)
+        return self._by_name.get(name) or self._by_legacy_name.get(name)
+
+
+    def _index_file(self, fo):
+        self._by_path[fo.path] = fo
+        self._by_name.setdefault(fo.name, fo)
+
+        legacy_name = _legacy_name(fo.path)
+        if legacy_name != fo.name:
+            self._by_legacy_name.setdefault(legacy_name, fo)
+
+
+    def _unindex_file(self, fo):
+        legacy_name = _legacy_name(fo.path)
+        del self._by_path[fo.path]
+
+        if self._by_name.get(fo.name) is fo:
+            del self._by_name[fo.name]
+
+        if self._by_legacy_name.get(legacy_name) is fo:
+            del self._by_legacy_name[legacy_name]
+
+        # Another extension of the same name may have been shadowed
+        for f in self.files:
+            if f.name == fo.name or _legacy_name(f.path) == legacy_name:
+                self._index_file(f)
 
 
     def random(self) -> object:
@@ -106,40 +230,56 @@ class FileRepo:
             print('Unable to connect to bucket')
             return
 
-        subscriber = pubsub_v1.SubscriberClient()
-        subscription_path = subscriber.subscription_path(project_id, bucket_sub_name)
+        # Pub/Sub shares a subscription's messages out between its streams,
+        # so a stream per repo would see only some of the events and ack away
+        # the others. Subscribe once and route each event to its repo instead
+        with _subscriptions_lock:
+            subscriber = get_subscriber_client()
+            subscription_path = subscriber.subscription_path(project_id, bucket_sub_name)
+            repos = _subscriptions.get(subscription_path)
 
-        def callback(message):
-            print(f"Received {message.attributes['eventType']} message")
-            message.ack()
+            if repos is not None:
+                repos.append(self)
+                return
 
-            evnt_type = message.attributes['eventType']
+            _subscriptions[subscription_path] = [self]
 
-            if not evnt_type:
-                return
+        future = subscriber.subscribe(
+            subscription_path,
+            callback=partial(_dispatch_bucket_event, subscription_path),
+            flow_control=SUBSCRIBER_FLOW_CONTROL
+        )
 
-            obj_id = message.attributes['objectId']
-            bucket_dir, filename = os.path.split(obj_id)
+        with _subscriptions_lock:
+            _pull_futures[subscription_path] = future
 
-            if bucket_dir != self.bucket_dir:
-                return
 
-            if evnt_type == 'OBJECT_DELETE':
-                print(f'Deleting {filename}...')
-                self.delete_file(filename)
+    def handle_bucket_event(self, evnt_type, filename):
+        if evnt_type == 'OBJECT_DELETE':
+            print(f'Deleting {filename}...')
+            self.delete_file(filename)
+
+            try:
                 os.remove(os.path.join(self.base_path, filename))
-                print(f'{filename} deleted')
+            except FileNotFoundError:
+                print(f'{filename} was already deleted')
+                return
 
-            elif evnt_type == 'OBJECT_FINALIZE':
-                print(f'Downloading {filename}...')
-                download_file(
-                    bucket=self.bucket,
-                    bucket_path=self.bucket_dir,
-                    filename=filename,
-                    output_path=self.base_path,
-                    overwrite=True
-                )
-                self.add_file(filename)
-                print(f'{filename} added')
+            print(f'{filename} deleted')
+
+        elif evnt_type == 'OBJECT_FINALIZE':
+            print(f'Downloading {filename}...')
+            downloaded = download_file(
+                bucket=self.bucket,
+                bucket_path=self.bucket_dir,
+                filename=filename,
+                output_path=self.base_path,
+                overwrite=True
+            )
+
+            if not downloaded:
+                print(f'Unable to add {filename} - download failed')
+                return
 
-        subscriber.subscribe(subscription_path, callback=callback)
\ No newline at end of file
+            self.add_file(filename)
+            print(f'{filename} added')
@@ -1,78 +1,141 @@
 import os
+import logging
+import tempfile
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from tqdm import tqdm
+from requests.adapters import HTTPAdapter
 from google.cloud import storage
+from google.cloud.exceptions import NotFound
 from datetime import timezone, datetime
 
-def connect_to_bucket(bucket_name):
-    storage_client = storage.Client.from_service_account_json(os.environ['GOOGLE_APPLICATION_CREDENTIALS'])
-    bucket = storage_client.get_bucket(bucket_name)
-    return bucket
+logger = logging.getLogger('discord.gcs_helpers')
+
+URL_LIFETIME = 3600
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+# Listings only ever need blob names, skip the rest of the metadata
+LIST_FIELDS = 'items(name),nextPageToken'
+
+# The sound, resource and user repos all sync through the one client at once,
+# so leave room for each of them running a full download pool
+DEFAULT_HTTP_POOL_SIZE = DEFAULT_DOWNLOAD_WORKERS * 3
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+# Every FileRepo lives in the same bucket, so share one authenticated client
+# and bucket handle rather than creating a new one for each repo
+@lru_cache(maxsize=None)
+def get_storage_client(pool_size=DEFAULT_HTTP_POOL_SIZE):
+    client = storage.Client.from_service_account_json(os.environ['GOOGLE_APPLICATION_CREDENTIALS'])
+
+    # requests keeps 10 connections per host by default, so with more
+    # download threads than that the extras were opened and thrown away
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    client._http.mount('https://', adapter)
+
+    return client
+
+
+def connect_to_bucket(bucket_name, pool_size=DEFAULT_HTTP_POOL_SIZE):
+    # FileRepos can be created from several threads at once
+    with _buckets_lock:
+        if bucket_name not in _buckets:
+            _buckets[bucket_name] = get_storage_client(pool_size).get_bucket(bucket_name)
+
+        return _buckets[bucket_name]
 
 
 def download_file(bucket, bucket_path, filename, output_path, overwrite=False):
     bucket_path_full = os.path.join(bucket_path, filename)
     blob = bucket.blob(bucket_path_full)
 
-    if not blob.exists():
-        print(f'File {bucket_path_full} does not exist in the bucket')
-        return
-
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
     full_path = os.path.join(output_path, filename)
-    print(f'Downloading {blob.name} to {full_path}')
+    logger.info('Downloading %s to %s', blob.name, full_path)
 
     if not overwrite and os.path.isfile(full_path):
-       print(f'File download failed - File {full_path} exists and overwrite is set to False')
-       return
+       logger.warning('File download failed - File %s exists and overwrite is set to False', full_path)
+       return False
+
+    # A missing blob 404s on the download itself, so there's no need to
+    # spend a separate request asking whether it exists first. The download
+    # opens its file before the 404 comes back though, so write to a hidden
+    # temp file and only swap it in once it has all arrived
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{filename}.', suffix='.part', dir=output_path)
+    os.close(fd)
 
-    blob.download_to_filename(full_path)
+    try:
+        blob.download_to_filename(tmp_path)
+        os.replace(tmp_path, full_path)
+    except NotFound:
+        logger.warning('File %s does not exist in the bucket', bucket_path_full)
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
+    return True
 
-def download_files(bucket, bucket_path, output_path, overwrite=False):
-    blobs = bucket.list_blobs(prefix=bucket_path)
+
+def download_files(bucket, bucket_path, output_path, overwrite=False, max_workers=DEFAULT_DOWNLOAD_WORKERS):
+    blobs = bucket.list_blobs(prefix=bucket_path, fields=LIST_FIELDS)
 
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
-    current_files = [] if overwrite else os.listdir(output_path)
+    current_files = set()
+    if not overwrite:
+        with os.scandir(output_path) as entries:
+            current_files = {e.name for e in entries}
 
-    print(f'Downloading all files from {bucket_path} to {output_path}')
+    logger.info('Downloading all files from %s to %s', bucket_path, output_path)
     files_to_download = []
     for blob in blobs:
         if blob.name[-1] != '/':
             _, tail = os.path.split(blob.name)
 
-            if not overwrite and any(tail == fn for fn in current_files):
+            if tail in current_files:
                 continue
 
             full_path = os.path.join(output_path, tail)
             files_to_download.append((blob, full_path))
 
     if len(files_to_download):
-        for f in tqdm(files_to_download):
-            blob, full_path = f
-            blob.download_to_filename(full_path)
+        # Each download is a separate HTTP request, so run them side by side
+        # instead of waiting on each round trip in turn
+        workers = min(max_workers, len(files_to_download))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda f: f[0].download_to_filename(f[1]), files_to_download)
+            # Redraw at most twice a second rather than tqdm's default of ten
+            list(tqdm(results, total=len(files_to_download), mininterval=0.5, smoothing=0.1))
 
-        print(f'{bucket_path} download complete')
+        logger.info('%s download complete', bucket_path)
     else:
-        print(f'{bucket_path} had no files to download!')
+        logger.info('%s had no files to download!', bucket_path)
 
 
 def upload_file(bucket, source_path, bucket_path):
-    print(f'Uploading {source_path} to {bucket_path}')
+    logger.info('Uploading %s to %s', source_path, bucket_path)
     blob = bucket.blob(bucket_path)
     blob.upload_from_filename(source_path)
 
 
 def list_files(bucket, bucket_path):
-    blobs = bucket.list_blobs(prefix=bucket_path)
+    blobs = bucket.list_blobs(prefix=bucket_path, fields=LIST_FIELDS)
     return [b.name for b in filter(lambda x: x.name[-1] != '/', blobs)]
 
 
-def generate_url(bucket, bucket_path):
+def generate_url(bucket, bucket_path, expiration=None):
     blob = bucket.blob(bucket_path)
-    url_lifetime = int(datetime.now(tz=timezone.utc).timestamp()) + 3600
-    return blob.generate_signed_url(url_lifetime)
\ No newline at end of file
+
+    if expiration is None:
+        expiration = int(datetime.now(tz=timezone.utc).timestamp()) + URL_LIFETIME
+
+    return blob.generate_signed_url(expiration)
\ No newline at end of file
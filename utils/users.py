@@ -21,6 +21,7 @@ class UserManager():
     def __init__(self, user_repo):
         self.users = []
         self.user_repo = user_repo
+        self._users_with_birthdays = None
         self.users_json_file = self.user_repo.find(CONFIG_NAME)
 
         if self.users_json_file is None:
@@ -40,6 +41,7 @@ class UserManager():
                 entrance_filename=u['entrance_filename'],
                 birthday=u['birthday']
             ) for u in users_json]
+            self._users_with_birthdays = None
 
         print('Load complete')
 
@@ -57,6 +59,7 @@ class UserManager():
 
     def add_user(self, user_id, user_name, save=True):
         self.users.append(BotUser(user_id=user_id, user_name=user_name))
+        self._users_with_birthdays = None
         
         if save:
             self._save_user_json()
@@ -89,8 +92,16 @@ class UserManager():
             return
 
         user.add_birthday(birthday)
+        self._users_with_birthdays = None
         self._save_user_json()   
 
 
+    def get_users_with_birthdays(self):
+        if self._users_with_birthdays is None:
+            self._users_with_birthdays = [u for u in self.users if u.birthday is not None]
+
+        return self._users_with_birthdays
+
+
     def get_user(self, user_id):
         return next((f for f in self.users if f.user_id == user_id), None)        
\ No newline at end of file